@@ -1,17 +1,28 @@
 from fastapi import FastAPI, HTTPException, Request, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import sqlite3
+import asyncio
+import queue
+import threading
+from contextlib import contextmanager
 import csv
+import functools
+import gzip
 import os
-import pandas as pd
+import shutil
+import re
 from datetime import datetime
-import pytz
-import requests
+from zoneinfo import ZoneInfo
 import urllib.parse
-import json
+import uuid
+import orjson
+import logging
+
+log = logging.getLogger(__name__)
 
 app = FastAPI()
 app.add_middleware(
@@ -21,49 +32,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/img", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "img")), name="img")
+# The default compresslevel 9 takes ~0.6 ms per 37 KB JSON body vs ~0.2 ms at
+# level 4, for ~8% smaller output. /menu skips this: it is served pre-gzipped.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with long-lived caching; uploads never reuse a filename, so URLs are immutable."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+app.mount("/img", CachedStaticFiles(directory=os.path.join(os.path.dirname(__file__), "img")), name="img")
 
 DB_PATH = "orders.db"
 MENU_PATH = "menu.csv"
 MENU_XLSX_PATH = "menu.xlsx"
 MENU_JSON_PATH = "menu.json"
+HISTORY_PAGE_SIZE = 200
+IST = ZoneInfo("Asia/Kolkata")
+# Folder that menu images are resolved against and uploaded into
+IMG_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "img"))
 
 # --- Database setup ---
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-cur = conn.cursor()
-cur.execute("""
-CREATE TABLE IF NOT EXISTS orders (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    items TEXT,
-    name TEXT,
-    phone TEXT
-)
-""")
-# Add order_history table for persistent history
-cur.execute("""
-CREATE TABLE IF NOT EXISTS order_history (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    items TEXT,
-    name TEXT,
-    phone TEXT,
-    created_at TIMESTAMP
-)
-""")
-conn.commit()
+DB_POOL_SIZE = 5
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    cur = conn.cursor()
+    # WAL lets /admin reads run alongside /order writes; busy_timeout waits instead of "database is locked"
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=134217728")
+    return conn
+
+# Each request borrows its own connection; SQLite only has one writer, so writes
+# are serialized here with _write_lock instead of piling up on busy_timeout
+_pool = queue.Queue()
+for _ in range(DB_POOL_SIZE):
+    _pool.put(_connect())
+_write_lock = threading.Lock()
+
+@contextmanager
+def get_conn():
+    conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        _pool.put(conn)
+
+def init_db():
+    with _write_lock, get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            items TEXT,
+            name TEXT,
+            phone TEXT
+        )
+        """)
+        # Add order_history table for persistent history
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS order_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            items TEXT,
+            name TEXT,
+            phone TEXT,
+            created_at INTEGER
+        )
+        """)
+        conn.commit()
+        ensure_created_at_column(conn)
+        migrate_created_at_to_epoch(conn)
 
 # --- Ensure created_at column exists ---
-def ensure_created_at_column():
+def ensure_created_at_column(conn):
+    cur = conn.cursor()
     cur.execute("PRAGMA table_info(orders)")
     columns = [row[1] for row in cur.fetchall()]
     if "created_at" not in columns:
         # Add the column without default
-        cur.execute("ALTER TABLE orders ADD COLUMN created_at TIMESTAMP")
+        cur.execute("ALTER TABLE orders ADD COLUMN created_at INTEGER")
         conn.commit()
         # Set current timestamp for existing rows
-        cur.execute("UPDATE orders SET created_at = datetime('now') WHERE created_at IS NULL")
+        cur.execute("UPDATE orders SET created_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE created_at IS NULL")
         conn.commit()
 
-ensure_created_at_column()
+# --- Convert legacy "YYYY-MM-DD HH:MM:SS" created_at text to unix seconds ---
+def migrate_created_at_to_epoch(conn):
+    # Older databases declare created_at as TIMESTAMP, which has NUMERIC affinity,
+    # so the integers are stored natively without rebuilding the tables
+    for table in ("orders", "order_history"):
+        conn.execute(f"""
+        UPDATE {table} SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+        WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+        """)
+    conn.commit()
+
+init_db()
 
 # --- Models ---
 class Order(BaseModel):
@@ -76,58 +146,78 @@ class MenuItem(BaseModel):
     name: str
     price: float
 
-# --- Helper: get image url for a food item using local img/ folder or fallback to Unsplash ---
-def get_food_image_url(item_name):
-    img_folder = os.path.join(os.path.dirname(__file__), "..", "img")
-    candidates = [
-        item_name,
-        item_name.replace(" ", "_"),
-        item_name.replace("_", " "),
-        item_name.lower(),
-        item_name.lower().replace(" ", "_"),
-        item_name.lower().replace("_", " "),
-    ]
-    exts = [".jpg", ".jpeg", ".png", ".webp"]
+# --- Helper: index the local img/ folder, rebuilt only when the folder changes ---
+_IMAGE_INDEX = {"mtime": None, "version": 0, "value": {}}
+_image_index_lock = threading.Lock()
+
+def _build_image_index(img_folder):
+    """Map normalized (stripped, lowercased) image filenames to the originals."""
     try:
         files = os.listdir(img_folder)
     except Exception as e:
-        print(f"DEBUG: Could not list img folder: {e}")
-        files = []
-    # Normalize all file names for robust matching
-    normalized_files = [
-        (f, f.strip().lower()) for f in files
-        if os.path.isfile(os.path.join(img_folder, f))
-    ]
-    found = False
+        log.warning("Could not list img folder: %s", e)
+        return {}
+    return {
+        f.strip().lower(): f for f in files
+        if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    }
+
+def _refresh_image_index():
+    """Rebuild the image index if img/ changed and return its current version."""
+    with _image_index_lock:
+        try:
+            mtime = os.path.getmtime(IMG_FOLDER)
+        except OSError:
+            mtime = None  # No folder: the empty initial index already matches
+        if _IMAGE_INDEX["mtime"] != mtime:
+            # Swap the index before bumping the version, so a caller holding
+            # version N always reads an index at least as new as N
+            _IMAGE_INDEX["value"] = _build_image_index(IMG_FOLDER)
+            _IMAGE_INDEX["version"] += 1
+            _IMAGE_INDEX["mtime"] = mtime
+        return _IMAGE_INDEX["version"]
+
+# --- Helper: get image url for a food item using local img/ folder or fallback to Unsplash ---
+# Memoized per (name, index version), so a rebuilt index never serves stale URLs
+@functools.lru_cache(maxsize=2048)
+def get_food_image_url(item_name, index_version):
+    index = _IMAGE_INDEX["value"]
+    # The index is keyed on lowercased names, so only three spellings can differ;
+    # dict.fromkeys drops duplicates while keeping the lookup order
+    name = item_name.lower()
+    candidates = dict.fromkeys(
+        base.lstrip() for base in (name, name.replace(" ", "_"), name.replace("_", " "))
+    )
+    exts = (".jpg", ".jpeg", ".png", ".webp")
     for base in candidates:
         for ext in exts:
-            expected = f"{base}{ext}".strip().lower()
-            for orig_file, norm_file in normalized_files:
-                if norm_file == expected:
-                    print(f"Matched image for '{item_name}': {orig_file}")
-                    found = True
-                    return f"http://localhost:8000/img/{urllib.parse.quote(orig_file)}"
-    if not found:
-        print(f"No local image found for '{item_name}', using Unsplash fallback.")
+            orig_file = index.get(f"{base}{ext}")
+            if orig_file:
+                log.debug("Matched image for '%s': %s", item_name, orig_file)
+                return f"http://localhost:8000/img/{urllib.parse.quote(orig_file)}"
+    log.debug("No local image found for '%s', using Unsplash fallback.", item_name)
     query = item_name.replace(" ", "+")
     return f"https://source.unsplash.com/400x300/?{query},food"
 
 # --- Helper: parse extras string to extraOptions ---
+_RE_CHEESE_BURST_REGULAR = re.compile(r"Regular\s*-\s*Rs\.\s*(\d+)", re.I)
+_RE_CHEESE_BURST_MEDIUM = re.compile(r"Medium\s*-\s*Rs\.\s*(\d+)", re.I)
+_RE_ADD_CHEESE = re.compile(r"Add Cheese\s*Rs\s*(\d+)", re.I)
+
 def parse_extra_options(extras):
     options = []
     if not extras:
         return options
-    if "cheese burst" in extras.lower():
-        import re
-        reg = re.search(r"Regular\s*-\s*Rs\.\s*(\d+)", extras, re.I)
-        med = re.search(r"Medium\s*-\s*Rs\.\s*(\d+)", extras, re.I)
+    extras_lower = extras.lower()
+    if "cheese burst" in extras_lower:
+        reg = _RE_CHEESE_BURST_REGULAR.search(extras)
+        med = _RE_CHEESE_BURST_MEDIUM.search(extras)
         if reg:
             options.append({"name": "Cheese Burst (Regular)", "price": int(reg.group(1))})
         if med:
             options.append({"name": "Cheese Burst (Medium)", "price": int(med.group(1))})
-    elif "add cheese" in extras.lower():
-        import re
-        m = re.search(r"Add Cheese\s*Rs\s*(\d+)", extras, re.I)
+    elif "add cheese" in extras_lower:
+        m = _RE_ADD_CHEESE.search(extras)
         if m:
             options.append({"name": "Add Cheese", "price": int(m.group(1))})
     return options
@@ -135,22 +225,20 @@ def parse_extra_options(extras):
 # --- Menu helpers ---
 def group_menu(flat_menu):
     """Convert flat menu list to grouped structure for frontend."""
-    from collections import defaultdict
-    grouped = defaultdict(list)
-    pizza_subgroups = defaultdict(list)  # pizzaSubcategory -> [items]
+    # Plain dicts keep insertion order, so one pass fills the final groups directly
+    groups = {}  # category -> [items]
+    pizza_subgroups = {}  # pizzaSubcategory -> [items]
     for item in flat_menu:
         cat = item.get("category", "Menu")
-        pizza_subcat = item.get("pizzaSubcategory", "")
-        # Group pizza items only if category is PIZZA and has sizes
-        if cat and cat.upper() == "PIZZA" and item.get("sizes") and len(item["sizes"]) > 0:
-            pizza_subgroups[pizza_subcat or "Other"].append(item)
+        cat_upper = cat.upper() if cat else ""
+        if cat_upper == "PIZZA":
+            # Only pizza items with sizes are shown, grouped by pizzaSubcategory
+            if item.get("sizes"):
+                pizza_subcat = item.get("pizzaSubcategory", "") or "Other"
+                pizza_subgroups.setdefault(pizza_subcat, []).append(item)
         else:
-            grouped[cat].append(item)
-    menu = []
-    # Add normal groups (except PIZZA)
-    for cat, items in grouped.items():
-        if cat.upper() != "PIZZA":
-            menu.append({"subcategory": cat, "items": items})
+            groups.setdefault(cat, []).append(item)
+    menu = [{"subcategory": cat, "items": items} for cat, items in groups.items()]
     # Add pizza group (with subgroups)
     if pizza_subgroups:
         menu.append({
@@ -162,16 +250,67 @@ def group_menu(flat_menu):
         })
     return menu
 
+# --- Menu cache: parsed menu (and its JSON bytes) keyed on its source file and image set ---
+# One (key, menu, json_bytes, gzip_bytes) tuple, replaced in a single assignment so
+# concurrent loads can never leave a key, menu and bytes from different fills
+_MENU_CACHE = (None, None, None, None)
+
+def _menu_cache_key():
+    """Return (path, mtime, image index version) for the menu load_menu would build.
+
+    menu.json stores image URLs itself, so its key has no image version; the
+    xlsx/csv/demo menus resolve images from img/ and change when it does.
+    """
+    try:
+        return (MENU_JSON_PATH, os.path.getmtime(MENU_JSON_PATH), None)
+    except OSError:
+        pass
+    image_version = _refresh_image_index()
+    for path in (MENU_XLSX_PATH, MENU_PATH):
+        try:
+            return (path, os.path.getmtime(path), image_version)
+        except OSError:
+            continue
+    return (None, None, image_version)
+
+def _menu_snapshot():
+    """Return the current (key, menu, json_bytes, gzip_bytes) cache entry, refilling it if stale."""
+    global _MENU_CACHE
+    key = _menu_cache_key()
+    snapshot = _MENU_CACHE
+    if snapshot[0] == key:
+        return snapshot
+    menu = _load_menu_uncached(key[2])
+    json_bytes = orjson.dumps(menu)
+    # Compressed once per fill, so the best level costs nothing per request
+    snapshot = (key, menu, json_bytes, gzip.compress(json_bytes, compresslevel=9, mtime=0))
+    _MENU_CACHE = snapshot
+    return snapshot
+
 def load_menu():
+    return _menu_snapshot()[1]
+
+def load_menu_json():
+    """Return the grouped menu as (json_bytes, gzip_bytes), built once per cache fill."""
+    return _menu_snapshot()[2:]
+
+def _load_menu_uncached(image_version):
     # 1. If menu.json exists, load from it (admin-edited, flat)
     if os.path.exists(MENU_JSON_PATH):
-        with open(MENU_JSON_PATH, encoding="utf-8") as f:
-            flat = json.load(f)
+        with open(MENU_JSON_PATH, "rb") as f:
+            flat = orjson.loads(f.read())
         return group_menu(flat)
     # Try to load from Excel first
     if os.path.exists(MENU_XLSX_PATH):
         try:
-            df = pd.read_excel(MENU_XLSX_PATH, header=None)
+            # Imported here so startup does not pay for it when menu.json exists
+            import openpyxl
+            # read_only streams the sheet XML instead of building the full cell tree
+            wb = openpyxl.load_workbook(MENU_XLSX_PATH, read_only=True, data_only=True)
+            try:
+                rows = list(wb.worksheets[0].iter_rows(values_only=True))
+            finally:
+                wb.close()
             menu = []
             current_subcat = None
             subcat_items = []
@@ -184,14 +323,13 @@ def load_menu():
             pizza_subsubcat_items = []
             pizza_size_headers = []
 
-            for idx, row in df.iterrows():
-                name = str(row[0]).strip() if not pd.isna(row[0]) else ""
-                extras = str(row[1]).strip() if len(row) > 1 and not pd.isna(row[1]) else ""
-                price1 = row[2] if len(row) > 2 and not pd.isna(row[2]) else None
-                price2 = row[3] if len(row) > 3 and not pd.isna(row[3]) else None
+            for idx, row in enumerate(rows):
+                name, extras, price1, price2 = (tuple(row) + (None,) * 4)[:4]
+                name = str(name).strip() if name is not None else ""
+                extras = str(extras).strip() if extras is not None else ""
 
                 # Debug: Log each row being processed
-                print(f"DEBUG: Processing row {idx}: name={name}, extras={extras}, price1={price1}, price2={price2}")
+                log.debug("Processing row %s: name=%s, extras=%s, price1=%s, price2=%s", idx, name, extras, price1, price2)
 
                 # --- Detect subcategory/header (e.g., "PIZZA", "MAGGI") ---
                 if name and name.isupper() and (str(price1).lower() in ["price", "nan", ""] or price1 is None):
@@ -202,13 +340,13 @@ def load_menu():
                                 "subcategory": pizza_subsubcat,
                                 "items": pizza_subsubcat_items
                             })
-                            print(f"DEBUG: Added pizza subgroup '{pizza_subsubcat}' with items: {pizza_subsubcat_items}")
+                            log.debug("Added pizza subgroup '%s' with items: %s", pizza_subsubcat, pizza_subsubcat_items)
                         if current_subcat and pizza_groups:
                             menu.append({
                                 "subcategory": current_subcat,
                                 "items": pizza_groups
                             })
-                            print(f"DEBUG: Added pizza category '{current_subcat}' with groups: {pizza_groups}")
+                            log.debug("Added pizza category '%s' with groups: %s", current_subcat, pizza_groups)
                         pizza_mode = False
                         pizza_groups = []
                         pizza_subsubcat = None
@@ -219,7 +357,7 @@ def load_menu():
                             "subcategory": current_subcat,
                             "items": subcat_items
                         })
-                        print(f"DEBUG: Added category '{current_subcat}' with items: {subcat_items}")
+                        log.debug("Added category '%s' with items: %s", current_subcat, subcat_items)
                     current_subcat = name
                     subcat_items = []
                     # Enable pizza mode if this is PIZZA
@@ -229,7 +367,7 @@ def load_menu():
                         pizza_subsubcat = None
                         pizza_subsubcat_items = []
                         pizza_size_headers = []
-                        print("DEBUG: Entered pizza mode")
+                        log.debug("Entered pizza mode")
                     continue
 
                 # --- Detect pizza sub-subcategory (e.g., "VEG", "CHICKEN") and size headers ---
@@ -240,7 +378,7 @@ def load_menu():
                             "subcategory": pizza_subsubcat,
                             "items": pizza_subsubcat_items
                         })
-                        print(f"DEBUG: Added pizza subgroup '{pizza_subsubcat}' with items: {pizza_subsubcat_items}")
+                        log.debug("Added pizza subgroup '%s' with items: %s", pizza_subsubcat, pizza_subsubcat_items)
                     pizza_subsubcat = name
                     pizza_subsubcat_items = []
                     # Set size headers from price1 and price2
@@ -249,7 +387,7 @@ def load_menu():
                         pizza_size_headers.append(str(price1).strip())
                     if price2 and str(price2).strip().lower() not in ["nan", ""]:
                         pizza_size_headers.append(str(price2).strip())
-                    print(f"DEBUG: Detected pizza subcategory '{pizza_subsubcat}' with size headers: {pizza_size_headers}")
+                    log.debug("Detected pizza subcategory '%s' with size headers: %s", pizza_subsubcat, pizza_size_headers)
                     continue
 
                 # --- Pizza item ---
@@ -263,7 +401,7 @@ def load_menu():
                                     "price": float(price1),
                                 })
                             except ValueError as e:
-                                print(f"DEBUG: Failed to parse price1 '{price1}' for '{name}': {e}")
+                                log.debug("Failed to parse price1 '%s' for '%s': %s", price1, name, e)
                         if len(pizza_size_headers) > 1 and price2 not in [None, "nan", ""]:
                             try:
                                 options.append({
@@ -271,7 +409,7 @@ def load_menu():
                                     "price": float(price2),
                                 })
                             except ValueError as e:
-                                print(f"DEBUG: Failed to parse price2 '{price2}' for '{name}': {e}")
+                                log.debug("Failed to parse price2 '%s' for '%s': %s", price2, name, e)
                     else:
                         # Fallback if size headers are not set
                         if price1 not in [None, "nan", ""]:
@@ -281,7 +419,7 @@ def load_menu():
                                     "price": float(price1),
                                 })
                             except ValueError as e:
-                                print(f"DEBUG: Failed to parse price1 '{price1}' for '{name}': {e}")
+                                log.debug("Failed to parse price1 '%s' for '%s': %s", price1, name, e)
                         if price2 not in [None, "nan", ""]:
                             try:
                                 options.append({
@@ -289,20 +427,20 @@ def load_menu():
                                     "price": float(price2),
                                 })
                             except ValueError as e:
-                                print(f"DEBUG: Failed to parse price2 '{price2}' for '{name}': {e}")
+                                log.debug("Failed to parse price2 '%s' for '%s': %s", price2, name, e)
                     if options:  # Only add item if it has valid sizes
                         pizza_subsubcat_items.append({
                             "id": item_id,
                             "name": name,
                             "extras": extras if extras and extras.lower() != "nan" else "",
                             "sizes": options,
-                            "image": get_food_image_url(name),
+                            "image": get_food_image_url(name, image_version),
                             "extraOptions": parse_extra_options(extras)
                         })
-                        print(f"DEBUG: Added pizza item '{name}' with sizes: {options}")
+                        log.debug("Added pizza item '%s' with sizes: %s", name, options)
                         item_id += 1
                     else:
-                        print(f"DEBUG: Skipped pizza item '{name}' due to no valid sizes")
+                        log.debug("Skipped pizza item '%s' due to no valid sizes", name)
                     continue
 
                 # --- Non-pizza item ---
@@ -317,10 +455,10 @@ def load_menu():
                             "name": name,
                             "extras": extras if extras and extras.lower() != "nan" else "",
                             "price": price_val,
-                            "image": get_food_image_url(name),
+                            "image": get_food_image_url(name, image_version),
                             "extraOptions": parse_extra_options(extras)
                         })
-                        print(f"DEBUG: Added non-pizza item '{name}' with price: {price_val}")
+                        log.debug("Added non-pizza item '%s' with price: %s", name, price_val)
                         item_id += 1
                     continue
 
@@ -331,64 +469,79 @@ def load_menu():
                         "subcategory": pizza_subsubcat,
                         "items": pizza_subsubcat_items
                     })
-                    print(f"DEBUG: Added final pizza subgroup '{pizza_subsubcat}' with items: {pizza_subsubcat_items}")
+                    log.debug("Added final pizza subgroup '%s' with items: %s", pizza_subsubcat, pizza_subsubcat_items)
                 if current_subcat and pizza_groups:
                     menu.append({
                         "subcategory": current_subcat,
                         "items": pizza_groups
                     })
-                    print(f"DEBUG: Added final pizza category '{current_subcat}' with groups: {pizza_groups}")
+                    log.debug("Added final pizza category '%s' with groups: %s", current_subcat, pizza_groups)
             elif current_subcat and subcat_items:
                 menu.append({
                     "subcategory": current_subcat,
                     "items": subcat_items
                 })
-                print(f"DEBUG: Added final category '{current_subcat}' with items: {subcat_items}")
+                log.debug("Added final category '%s' with items: %s", current_subcat, subcat_items)
 
-            # Debug print to verify pizza section
-            print("DEBUG: Final menu structure:", menu)
+            # Debug log to verify pizza section
+            log.debug("Final menu structure: %s", menu)
             return menu
         except Exception as e:
-            print(f"Error loading menu.xlsx: {e}")
+            log.warning("Error loading menu.xlsx: %s", e)
             # Fallback to CSV or demo menu
-            return load_fallback_menu()
+            return load_fallback_menu(image_version)
 
     # Fallback to CSV or demo menu
-    return load_fallback_menu()
+    return load_fallback_menu(image_version)
 
-def load_fallback_menu():
+def load_fallback_menu(image_version):
     menu = []
     if os.path.exists(MENU_PATH):
         with open(MENU_PATH, newline='', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 if row.get("id") and row.get("name") and row.get("price"):
+                    # Convert numbers first so malformed rows skip the image lookup
                     try:
-                        # Use image from CSV if present, otherwise fallback to local/unsplash
-                        image = row.get("image")
-                        if not image or image.strip() == "":
-                            image = get_food_image_url(row["name"])
-                        menu.append({
-                            "id": int(row["id"]),
-                            "name": row["name"],
-                            "price": float(row["price"]),
-                            "image": image,
-                            "extraOptions": parse_extra_options(row.get("extras", ""))
-                        })
-                    except Exception:
+                        item_id = int(row["id"])
+                        price = float(row["price"])
+                    except ValueError:
                         continue
+                    # Use image from CSV if present, otherwise fallback to local/unsplash
+                    image = row.get("image")
+                    if not image or not image.strip():
+                        image = get_food_image_url(row["name"], image_version)
+                    menu.append({
+                        "id": item_id,
+                        "name": row["name"],
+                        "price": price,
+                        "image": image,
+                        "extraOptions": parse_extra_options(row.get("extras", ""))
+                    })
     if not menu:
         menu = [
-            {"id": 1, "name": "Plain Maggi", "price": 49, "image": get_food_image_url("Plain Maggi")},
-            {"id": 2, "name": "Butter Maggi", "price": 59, "image": get_food_image_url("Butter Maggi")},
+            {"id": 1, "name": "Plain Maggi", "price": 49, "image": get_food_image_url("Plain Maggi", image_version)},
+            {"id": 2, "name": "Butter Maggi", "price": 59, "image": get_food_image_url("Butter Maggi", image_version)},
         ]
     # Wrap fallback in a single category for frontend compatibility
     return [{"subcategory": "Menu", "items": menu}]
 
 def save_menu(flat_menu):
-    # Save the flat menu as JSON (admin source of truth)
-    with open(MENU_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(flat_menu, f, ensure_ascii=False, indent=2)
+    global _MENU_CACHE
+    # Save the flat menu as JSON (admin source of truth). Serialize before touching
+    # the file (orjson raises JSONEncodeError on e.g. ints beyond 64 bits), then
+    # swap a temp file into place so readers never see a partial menu.json
+    data = orjson.dumps(flat_menu, option=orjson.OPT_INDENT_2)
+    tmp_path = f"{MENU_JSON_PATH}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(data)
+        os.replace(tmp_path, MENU_JSON_PATH)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _MENU_CACHE = (None, None, None, None)
     # Optionally, also save to CSV for backup (not used for loading anymore)
     # with open(MENU_PATH, "w", newline='', encoding='utf-8') as f:
     #     writer = csv.DictWriter(f, fieldnames=["id", "name", "price", "image"])
@@ -436,10 +589,67 @@ def flatten_menu(menu):
                 })
     return flat
 
+# --- Helper: format a unix-seconds timestamp as dd/mm/yyyy HH:MM:SS in IST ---
+def _format_ist(created_at):
+    # Rows the epoch migration could not parse are returned as stored
+    if not isinstance(created_at, int):
+        return created_at
+    return datetime.fromtimestamp(created_at, IST).strftime("%d/%m/%Y %H:%M:%S")
+
+# --- Order storage (blocking sqlite3 calls; endpoints run these via asyncio.to_thread) ---
+def _insert_order(items, name, phone):
+    with _write_lock, get_conn() as conn:
+        with conn:
+            conn.execute(
+                "INSERT INTO orders (items, name, phone, created_at) VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))",
+                (items, name, phone)
+            )
+
+def _fetch_orders():
+    with get_conn() as conn:
+        # created_at is stored as unix seconds; keep returning the UTC text form.
+        # Rows the epoch migration could not parse are returned as stored.
+        rows = conn.execute(
+            "SELECT id, items, name, phone, "
+            "CASE WHEN typeof(created_at) = 'integer' THEN datetime(created_at, 'unixepoch') ELSE created_at END "
+            "FROM orders ORDER BY id DESC"
+        ).fetchall()
+    return [
+        {"id": r[0], "items": r[1], "name": r[2], "phone": r[3], "created_at": r[4]}
+        for r in rows
+    ]
+
+def _move_orders_to_history():
+    # Move all current orders to order_history before deleting, as one
+    # transaction: the write lock is taken up front and both statements commit together
+    with _write_lock, get_conn() as conn:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO order_history (items, name, phone, created_at) SELECT items, name, phone, created_at FROM orders")
+            conn.execute("DELETE FROM orders")
+
+def _fetch_order_history(offset):
+    # id is the rowid, so ORDER BY id DESC walks the table backwards with no sort step
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, items, name, phone, created_at FROM order_history ORDER BY id DESC LIMIT ? OFFSET ?",
+            (HISTORY_PAGE_SIZE, offset)
+        ).fetchall()
+    return [
+        {"id": r[0], "items": r[1], "name": r[2], "phone": r[3], "created_at": _format_ist(r[4])}
+        for r in rows
+    ]
+
 # --- API Endpoints ---
 @app.get("/menu")
-def get_menu():
-    return load_menu()
+def get_menu(request: Request):
+    json_bytes, gzip_bytes = load_menu_json()
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        # GZipMiddleware passes through responses that already set Content-Encoding
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gzip_bytes, media_type="application/json", headers=headers)
+    return Response(content=json_bytes, media_type="application/json", headers=headers)
 
 # Debug endpoint to verify images in menu
 @app.get("/menu/debug")
@@ -459,9 +669,8 @@ def get_menu_debug():
 
 @app.get("/img/debug")
 def img_debug():
-    img_folder = os.path.join(os.path.dirname(__file__), "..", "img")
     try:
-        files = os.listdir(img_folder)
+        files = os.listdir(IMG_FOLDER)
     except Exception:
         files = []
     # Only show image files
@@ -477,75 +686,50 @@ def img_debug():
 
 @app.post("/admin/upload-image")
 async def upload_image(file: UploadFile = File(...)):
-    img_folder = os.path.join(os.path.dirname(__file__), "..", "img")
-    os.makedirs(img_folder, exist_ok=True)
+    os.makedirs(IMG_FOLDER, exist_ok=True)
     filename = file.filename
-    # Ensure unique filename
-    base, ext = os.path.splitext(filename)
-    i = 1
-    while os.path.exists(os.path.join(img_folder, filename)):
-        filename = f"{base}_{i}{ext}"
-        i += 1
-    file_path = os.path.join(img_folder, filename)
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    # Ensure unique filename; mode "x" (O_EXCL) makes the existence check and the create one step
+    try:
+        out = open(os.path.join(IMG_FOLDER, filename), "xb")
+    except FileExistsError:
+        base, ext = os.path.splitext(filename)
+        filename = f"{base}_{uuid.uuid4().hex[:8]}{ext}"
+        out = open(os.path.join(IMG_FOLDER, filename), "xb")
+    with out:
+        # Stream in 1 MiB chunks instead of holding the whole upload in memory
+        await asyncio.to_thread(shutil.copyfileobj, file.file, out, 1 << 20)
+    # Force an index rebuild even if img/'s mtime did not visibly change; the new
+    # index version also moves the menu cache key for xlsx/csv menus
+    with _image_index_lock:
+        _IMAGE_INDEX["mtime"] = None
     url = f"http://localhost:8000/img/{urllib.parse.quote(filename)}"
     return {"url": url}
 
 @app.post("/order")
-def place_order(order: Order):
-    cur.execute(
-        "INSERT INTO orders (items, name, phone, created_at) VALUES (?, ?, ?, datetime('now'))",
-        (order.items, order.name, order.phone)
-    )
-    conn.commit()
+async def place_order(order: Order):
+    await asyncio.to_thread(_insert_order, order.items, order.name, order.phone)
     return {"status": "success"}
 
 @app.get("/admin/orders")
-def get_orders():
-    cur.execute("SELECT id, items, name, phone, created_at FROM orders ORDER BY id DESC")
-    rows = cur.fetchall()
-    return [
-        {"id": r[0], "items": r[1], "name": r[2], "phone": r[3], "created_at": r[4]}
-        for r in rows
-    ]
+async def get_orders():
+    return await asyncio.to_thread(_fetch_orders)
 
 @app.post("/admin/clear")
-def clear_orders():
-    # Move all current orders to order_history before deleting
-    cur.execute("INSERT INTO order_history (items, name, phone, created_at) SELECT items, name, phone, created_at FROM orders")
-    cur.execute("DELETE FROM orders")
-    conn.commit()
+async def clear_orders():
+    await asyncio.to_thread(_move_orders_to_history)
     return {"status": "cleared"}
 
 @app.get("/admin/history")
-def get_order_history():
-    cur.execute("SELECT id, items, name, phone, created_at FROM order_history ORDER BY id DESC")
-    rows = cur.fetchall()
-    ist = pytz.timezone("Asia/Kolkata")
-    result = []
-    for r in rows:
-        # Parse UTC time and convert to IST, then format as dd/mm/yyyy HH:MM:SS
-        try:
-            # Try parsing as ISO format, fallback to as-is if fails
-            dt = datetime.strptime(r[4], "%Y-%m-%d %H:%M:%S")
-            dt_ist = pytz.utc.localize(dt).astimezone(ist)
-            formatted = dt_ist.strftime("%d/%m/%Y %H:%M:%S")
-        except Exception:
-            formatted = r[4]
-        result.append({
-            "id": r[0],
-            "items": r[1],
-            "name": r[2],
-            "phone": r[3],
-            "created_at": formatted
-        })
-    return result
+async def get_order_history(offset: int = 0):
+    return await asyncio.to_thread(_fetch_order_history, offset)
 
 @app.post("/admin/menu")
 def update_menu(menu: list[dict]):
     # Save the menu as provided (including admin-updated images)
-    save_menu(menu)
+    try:
+        save_menu(menu)
+    except orjson.JSONEncodeError as e:
+        raise HTTPException(status_code=400, detail=f"Menu is not JSON-serializable: {e}")
     return {"status": "menu updated"}
 
 @app.get("/admin/export-menu")